@@ -1,22 +1,29 @@
 import os
+import atexit
 import argparse
-from pykml import parser
 from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.tag import pos_tag
-from typing import Dict, List, Tuple
+from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+from geopy.extra.rate_limiter import RateLimiter
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 from lxml import etree
-import time
+import threading
+import weakref
 from random import uniform
 from serpapi import GoogleSearch
 import json
+import orjson
+import re
 from datetime import datetime
 import hashlib
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from usaspending_api import USASpendingAPI
 
 # Load environment variables from .env.local first, then fall back to .env
@@ -36,8 +43,139 @@ KML_NS = {
     'gx': "http://www.google.com/kml/ext/2.2"
 }
 
+# Resolve the tags we dispatch on to their local names once, so placemark
+# children can be matched with a dict lookup instead of splitting namespaces
+_PLACEMARK_TAGS = ('name', 'n', 'Point', 'Polygon', 'MultiGeometry', 'ExtendedData', 'LookAt')
+_LOOKAT_TAGS = ('altitude', 'range', 'heading', 'tilt')
+_LOCAL_NAMES = {}
+_LOOKAT_KEYS = {}  # LookAt tag -> extended_data key it is stored under
+for _tag in _PLACEMARK_TAGS:
+    _LOCAL_NAMES[f"{{{KML_NS['kml']}}}{_tag}"] = _tag
+    _LOCAL_NAMES[_tag] = _tag  # KML written without a default namespace
+for _tag in _LOOKAT_TAGS:
+    _LOOKAT_KEYS[f"{{{KML_NS['kml']}}}{_tag}"] = f'view_{_tag}'
+    _LOOKAT_KEYS[_tag] = f'view_{_tag}'
+
+# Precompiled XPath lookups used while extracting placemark details
+_XP_POINT = etree.XPath(".//kml:Point", namespaces=KML_NS)
+_XP_POLYGON = etree.XPath(".//kml:Polygon", namespaces=KML_NS)
+_XP_POINT_COORDS = etree.XPath("kml:coordinates/text()", namespaces=KML_NS)
+_XP_POLY_COORDS = etree.XPath("kml:outerBoundaryIs/kml:LinearRing/kml:coordinates/text()", namespaces=KML_NS)
+_XP_EXTDATA = etree.XPath("kml:Data", namespaces=KML_NS)
+_XP_DATA_VALUE = etree.XPath("kml:value/text()", namespaces=KML_NS)
+
+# Whole words that mark a term as likely belonging to an organization
+_ORG_RE = re.compile(r"\b(?:Inc|Corp(?:oration)?|LLC|Ltd|Company|Association)\b")
+
+# Analyzers whose unsaved search results are flushed when the process exits;
+# held weakly so registering does not keep instances alive
+_LIVE_ANALYZERS = weakref.WeakSet()
+
+@atexit.register
+def _flush_live_analyzers() -> None:
+    for analyzer in list(_LIVE_ANALYZERS):
+        analyzer._save_cache_if_dirty()
+
+@lru_cache(maxsize=4096)
+def _is_organization_term(term: str) -> bool:
+    """Simple heuristic to identify if a term is likely an organization."""
+    return _ORG_RE.search(term) is not None
+
+# Words that add nothing to a web search query
+_QUERY_STOPWORDS = frozenset({'the', 'and', 'test', 'model', 'city'})
+
+# Words that are never worth sending to the geocoder, including the generic
+# words already left out of search queries
+_CONTEXT_STOPWORDS = _QUERY_STOPWORDS | {'of', 'for', 'at', 'in', 'on', 'by', 'to'}
+
+# Capitalized words made of letters and hyphens; rejects numbers and punctuated tokens
+_GEOCODE_CANDIDATE_RE = re.compile(r"[A-Z][a-zA-Z\-]{2,}")
+
+def _load_place_names(path: str) -> frozenset:
+    """Load the bundled gazetteer of single-word place names, lowercased."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return frozenset(
+                line.strip().lower() for line in f
+                if line.strip() and not line.startswith('#')
+            )
+    except OSError as e:
+        logger.warning(f"ALAINA: Could not load place names from {path}: {str(e)}")
+        return frozenset()
+
+# Offline gazetteer of US states and Nevada counties/towns
+_PLACE_NAMES = _load_place_names(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'place_names.txt'))
+_PLACE_SUFFIXES = ('ville', 'burg', 'town', 'berg')
+
+def _is_known_place(term: str) -> bool:
+    """Check a term against the offline gazetteer and common town-name suffixes."""
+    term = term.lower()
+    return term in _PLACE_NAMES or term.endswith(_PLACE_SUFFIXES)
+
+def _is_geocode_candidate(term: str) -> bool:
+    """Cheap local check for whether a term could plausibly be a place name."""
+    return _GEOCODE_CANDIDATE_RE.fullmatch(term) is not None and term.lower() not in _CONTEXT_STOPWORDS
+
+@lru_cache(maxsize=4096)
+def _geocode_is_location(geocode, term: str) -> bool:
+    """Geocode a term once per geocoder and report whether it resolved."""
+    return geocode(term, timeout=5) is not None
+
+def _iter_placemarks(kml_file_path: str):
+    """Stream Placemark elements from a KML file without building the whole tree."""
+    context = etree.iterparse(
+        kml_file_path,
+        events=("end",),
+        tag=f"{{{KML_NS['kml']}}}Placemark",
+        collect_ids=False,        # KML ids are never looked up, skip the id hash table
+        remove_blank_text=True,   # Drop whitespace-only text nodes between elements
+        huge_tree=True            # Allow very large or deeply nested documents
+    )
+    for _, placemark in context:
+        yield placemark
+        # Free the processed placemark and any siblings already handled
+        placemark.clear()
+        while placemark.getprevious() is not None:
+            del placemark.getparent()[0]
+
+def _parse_coordinate(coords_text: str) -> Dict:
+    """Parse a single KML 'lon,lat[,alt]' tuple into a lat/lon dict."""
+    coords_parts = coords_text.split(',', 2)
+    return {'lat': float(coords_parts[1]), 'lon': float(coords_parts[0])}
+
+@lru_cache(maxsize=4096)
+def _reverse_geocode_name(reverse, lat: float, lon: float) -> Optional[str]:
+    """Reverse geocode a (rounded) coordinate once per geocoder."""
+    location = reverse((lat, lon))
+    return str(location) if location else None
+
+# Locations sharing a query are only searched together within tiles of this size (degrees)
+BIAS_TILE_DEGREES = 0.25
+
+def _bias_tile(location: Dict) -> Optional[Tuple[int, int]]:
+    """Tile of a location's coordinates, or None if it has none."""
+    coords = location.get('coordinates')
+    if not coords:
+        return None
+    return (round(coords['lat'] / BIAS_TILE_DEGREES), round(coords['lon'] / BIAS_TILE_DEGREES))
+
+# Upper bound on concurrent search API requests
+MAX_SEARCH_WORKERS = 8
+# Upper bound on geocoding threads; Nominatim's rate limit makes more pointless
+MAX_GEOCODE_WORKERS = 8
+
 class LocationAnalyzer:
-    def __init__(self, kml_file_path: str, max_places: int = None, debug: bool = False, bust_cache: bool = False, search_radius_miles: float = 50):
+    # Validation result per API key in this process, shared by all instances
+    _KEY_VALIDITY = {}  # API key -> whether it validated
+    _VALIDATION_LOCK = threading.Lock()
+    # Geocoder and search sessions reused by every instance, created on first use
+    _SHARED_GEOLOCATOR = None
+    _SHARED_HTTP = {}  # API key -> requests.Session
+    _SHARED_CONTRACT_APIS = {}  # search radius -> USASpendingAPI
+    _SHARED_LOGS = {}  # usage log path -> (open file, write lock)
+    _SHARED_LOCK = threading.Lock()
+
+    def __init__(self, kml_file_path: str, max_places: int = None, debug: bool = False, bust_cache: bool = False, search_radius_miles: float = 50, geocode_workers: int = 4, search_workers: int = 4, deep_geocode: bool = False):
         """Initialize the LocationAnalyzer with a KML file path."""
         self.kml_file_path = kml_file_path
         self.max_places = max_places
@@ -45,28 +183,42 @@ class LocationAnalyzer:
         self.bust_cache = bust_cache
         self.search_radius_miles = search_radius_miles
         self.locations = []
-        self.geolocator = Nominatim(user_agent="location_analyzer")
+        # The geocoder and its rate limiters are shared by every instance in the process
+        self.geolocator, self._geocode, self._reverse = LocationAnalyzer._shared_geocoder()
+        self.geocode_workers = max(1, min(geocode_workers, MAX_GEOCODE_WORKERS))
+        # Words are classified against the offline gazetteer unless deep geocoding is requested
+        self.deep_geocode = deep_geocode
+        self._location_terms = {}  # term -> whether geocoding found a location (successful lookups only)
+        # Keep concurrent searches within what the search API tolerates
+        self.search_workers = max(1, min(search_workers, MAX_SEARCH_WORKERS))
         self.api_key = os.getenv("SERPAPI_KEY")
         if not self.api_key:
             raise ValueError("SERPAPI_KEY environment variable not set")
         
-        # Initialize USASpending API client
-        self.contract_api = USASpendingAPI(radius_miles=search_radius_miles)
+        self.max_retries = 3
+        self.base_delay = 2  # Base delay in seconds
         
-        # Initialize results storage
-        self.contract_results = {}
+        # Reuse one keep-alive session per API key for every search API call
+        self._http = self._shared_session(self.api_key)
+        self.request_timeout = (5, 15)  # (connect, read) seconds
         
-        # Validate API key before proceeding
-        if not self._validate_api_key():
-            raise ValueError("Invalid SERPAPI_KEY - please check your API key at https://serpapi.com/manage-api-key")
+        # USASpending API client, shared by every instance using the same radius
+        self.contract_api = LocationAnalyzer._shared_contract_api(search_radius_miles)
         
-        self.max_retries = 3
-        self.base_delay = 2  # Base delay in seconds
+        # Initialize results storage
+        self.contract_results = {}
         
         # Set up cache and API tracking files
         self.cache_file = "search_cache.json"
         self.api_log_file = "api_usage.log"
         self.cache = self._load_cache()
+        # Searches run on worker threads, so cache and log writes are serialized
+        self._cache_lock = threading.Lock()
+        # New results are written out in one go rather than after every query
+        self._cache_dirty = False
+        _LIVE_ANALYZERS.add(self)
+        # One open, buffered usage log per process; it is flushed when the process exits
+        self._log_fh, self._log_lock = LocationAnalyzer._shared_usage_log(self.api_log_file)
         
         if self.debug:
             logger.setLevel(logging.DEBUG)
@@ -74,26 +226,72 @@ class LocationAnalyzer:
         logger.debug(f"ALAINA: Initializing LocationAnalyzer with file: {kml_file_path}")
         logger.debug(f"ALAINA: Cache busting enabled: {bust_cache}")
         logger.debug(f"ALAINA: Max places to process: {max_places if max_places else 'All'}")
-        
-        # Download required NLTK data
-        try:
-            nltk.download('punkt')
-            nltk.download('averaged_perceptron_tagger')
-            nltk.download('maxent_ne_chunker')
-            nltk.download('words')
-        except LookupError as e:
-            logger.error(f"ALAINA: Error downloading NLTK data: {str(e)}")
+
+    @classmethod
+    def _shared_geocoder(cls) -> Tuple[Nominatim, RateLimiter, RateLimiter]:
+        """Create the process-wide geocoder and its rate-limited lookups on first use."""
+        with cls._SHARED_LOCK:
+            if cls._SHARED_GEOLOCATOR is None:
+                geolocator = Nominatim(user_agent="location_analyzer")
+                # Respect Nominatim's 1 request/second policy across all worker threads
+                # Errors are raised rather than swallowed so failed lookups are never memoized
+                cls._SHARED_GEOLOCATOR = (
+                    geolocator,
+                    RateLimiter(geolocator.geocode, min_delay_seconds=1.1, swallow_exceptions=False),
+                    RateLimiter(geolocator.reverse, min_delay_seconds=1.1, swallow_exceptions=False)
+                )
+            return cls._SHARED_GEOLOCATOR
+
+    @classmethod
+    def _shared_contract_api(cls, radius_miles: float) -> USASpendingAPI:
+        """Return the process-wide USAspending client for a search radius, creating it on first use."""
+        with cls._SHARED_LOCK:
+            contract_api = cls._SHARED_CONTRACT_APIS.get(radius_miles)
+            if contract_api is None:
+                contract_api = USASpendingAPI(radius_miles=radius_miles)
+                cls._SHARED_CONTRACT_APIS[radius_miles] = contract_api
+            return contract_api
+
+    @classmethod
+    def _shared_usage_log(cls, path: str):
+        """Return the process-wide usage log handle and its write lock, opening it on first use."""
+        with cls._SHARED_LOCK:
+            shared = cls._SHARED_LOGS.get(path)
+            if shared is None:
+                log_fh = open(path, 'a', buffering=1 << 16)
+                atexit.register(log_fh.close)
+                shared = (log_fh, threading.Lock())
+                cls._SHARED_LOGS[path] = shared
+            return shared
+
+    def _shared_session(self, api_key: str) -> requests.Session:
+        """Return the process-wide search API session for an API key, creating it on first use."""
+        with LocationAnalyzer._SHARED_LOCK:
+            session = LocationAnalyzer._SHARED_HTTP.get(api_key)
+            if session is None:
+                # Transient failures and rate limiting are retried with exponential backoff
+                session = requests.Session()
+                session.headers.update({
+                    "Accept": "application/json",
+                    "Authorization": f"Bearer {api_key}"
+                })
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=self.base_delay,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=["GET"],
+                    raise_on_status=False
+                )
+                session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+                LocationAnalyzer._SHARED_HTTP[api_key] = session
+            return session
 
     def _validate_api_key(self) -> bool:
         """Validate the API key by making a test request."""
         try:
             logger.info("ALAINA: Validating API key...")
             url = "https://www.searchapi.io/api/v1/me"
-            headers = {
-                "Accept": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            response = requests.get(url, headers=headers)
+            response = self._http.get(url, timeout=self.request_timeout)
             
             if response.status_code == 200:
                 logger.info("ALAINA: API key validation successful")
@@ -107,6 +305,17 @@ class LocationAnalyzer:
             logger.error(f"ALAINA: API key validation failed with error: {str(e)}")
             return False
 
+    def _ensure_api_key_valid(self) -> None:
+        """Validate the API key the first time a live search is needed."""
+        with LocationAnalyzer._VALIDATION_LOCK:
+            # Failures are remembered too, so an invalid key is only checked once
+            valid = LocationAnalyzer._KEY_VALIDITY.get(self.api_key)
+            if valid is None:
+                valid = self._validate_api_key()
+                LocationAnalyzer._KEY_VALIDITY[self.api_key] = valid
+        if not valid:
+            raise ValueError("Invalid SERPAPI_KEY - please check your API key at https://serpapi.com/manage-api-key")
+
     def _load_cache(self) -> Dict:
         """Load the search cache from file."""
         if self.bust_cache:
@@ -115,8 +324,8 @@ class LocationAnalyzer:
             
         try:
             if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
+                with open(self.cache_file, 'rb') as f:
+                    return orjson.loads(f.read())
         except Exception as e:
             logger.error(f"ALAINA: Error loading cache: {str(e)}")
         return {}
@@ -124,12 +333,20 @@ class LocationAnalyzer:
     def _save_cache(self) -> None:
         """Save the search cache to file."""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with open(self.cache_file, 'wb') as f:
+                f.write(orjson.dumps(self.cache))
             logger.info("ALAINA: Cache saved successfully")
         except Exception as e:
             logger.error(f"ALAINA: Error saving cache: {str(e)}")
 
+    def _save_cache_if_dirty(self) -> None:
+        """Save the search cache only if new results were added since the last save."""
+        with self._cache_lock:
+            if not self._cache_dirty:
+                return
+            self._save_cache()
+            self._cache_dirty = False
+
     def _log_api_usage(self, query: str, success: bool) -> None:
         """Log API usage with timestamp and details."""
         try:
@@ -141,8 +358,8 @@ class LocationAnalyzer:
                 'api_key_last_4': self.api_key[-4:] if self.api_key else 'none'
             }
             
-            with open(self.api_log_file, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            with self._log_lock:
+                self._log_fh.write(json.dumps(log_entry) + '\n')
                 
             logger.info(f"ALAINA: API call logged - Success: {success}")
         except Exception as e:
@@ -165,29 +382,40 @@ class LocationAnalyzer:
         logger.info("ALAINA: Starting KML file parsing")
         
         try:
-            with open(self.kml_file_path, 'rb') as kml_file:
-                logger.debug("ALAINA: Reading KML file")
-                tree = parser.parse(kml_file)
-                root = tree.getroot()
-                
-                # Extract Placemarks using proper namespace
-                placemarks = root.findall(".//kml:Placemark", namespaces=KML_NS)
-                total_placemarks = len(placemarks)
-                logger.info(f"ALAINA: Found {total_placemarks} total placemarks")
-                
-                # Limit placemarks if max_places is set
-                if self.max_places:
-                    placemarks = placemarks[:self.max_places]
-                    logger.info(f"ALAINA: Processing first {self.max_places} placemarks")
-                
+            logger.debug("ALAINA: Streaming placemarks from KML file")
+            # Placemarks past max_places are never parsed
+            placemarks = islice(_iter_placemarks(self.kml_file_path), self.max_places)
+            if self.max_places:
+                logger.info(f"ALAINA: Processing first {self.max_places} placemarks")
+            
+            # Geocoding runs in the background while the rest of the file is parsed;
+            # without deep geocoding there are no lookups, so no threads are started
+            pending_terms = {}
+            location_words = []  # Words split from each location's name, split only once
+            pool = ThreadPoolExecutor(max_workers=self.geocode_workers) if self.deep_geocode else nullcontext()
+            with pool as executor:
                 for idx, placemark in enumerate(placemarks, 1):
-                    logger.debug(f"ALAINA: Processing placemark {idx}/{len(placemarks)}")
+                    logger.debug("ALAINA: Processing placemark %s", idx)
                     location_info = self._extract_placemark_info(placemark)
                     if location_info:
                         self.locations.append(location_info)
                         logger.info(f"ALAINA: Found location: {location_info['name']}")
-                        if self.debug:
-                            logger.debug(f"ALAINA: Location details: {location_info}")
+                        words = self._split_name(location_info['name'])
+                        location_words.append(words)
+                        self._queue_location_terms(words, executor, pending_terms)
+                
+                if pending_terms:
+                    logger.info(f"ALAINA: Waiting on geocoding for {len(pending_terms)} unique terms")
+                for term, future in pending_terms.items():
+                    found = future.result()
+                    if found is not None:  # Failed lookups are retried on the next parse
+                        self._location_terms[term] = found
+            
+            # Every unique term has been geocoded once; classify each location's context
+            for location_info, words in zip(self.locations, location_words):
+                location_info['context'] = self._build_context(location_info['name'], words)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("ALAINA: Location details: %s", location_info)
                         
             logger.info(f"ALAINA: Successfully parsed {len(self.locations)} locations from KML file")
         except Exception as e:
@@ -197,159 +425,218 @@ class LocationAnalyzer:
     def _extract_placemark_info(self, placemark) -> Dict:
         """Extract relevant information from a placemark."""
         try:
-            # Get name from either name or n tag using proper namespace
+            # Walk the placemark's children once, keeping the elements we care about
             name = None
-            # Try name tag first
-            name_tag = placemark.find(".//kml:name", namespaces=KML_NS)
-            if name_tag is not None and name_tag.text:
-                name = name_tag.text.strip()
-                logger.debug(f"ALAINA: Found name tag with value: {name}")
+            n_tag = None
+            point = None
+            polygon = None
+            ext_data = None
+            look_at = None
+            for child in placemark:
+                tag = _LOCAL_NAMES.get(child.tag)
+                if tag == 'name':
+                    if name is None and child.text:
+                        name = child.text.strip()
+                        logger.debug("ALAINA: Found name tag with value: %s", name)
+                elif tag == 'n':
+                    if n_tag is None:
+                        n_tag = child
+                elif tag == 'Point':
+                    point = child
+                elif tag == 'Polygon':
+                    polygon = child
+                elif tag == 'MultiGeometry':
+                    # Use the first Point/Polygon inside a MultiGeometry
+                    if point is None:
+                        point = next(iter(_XP_POINT(child)), None)
+                    if polygon is None:
+                        polygon = next(iter(_XP_POLYGON(child)), None)
+                elif tag == 'ExtendedData':
+                    ext_data = child
+                elif tag == 'LookAt':
+                    look_at = child
             
             # If no name tag found, try n tag
-            if not name:
-                n_tag = placemark.find("n")  # Try without namespace first
-                if n_tag is None:
-                    n_tag = placemark.find(".//kml:n", namespaces=KML_NS)  # Try with namespace
-                
-                if n_tag is not None and n_tag.text:
-                    name = n_tag.text.strip()
-                    logger.debug(f"ALAINA: Found n tag with value: {name}")
+            if not name and n_tag is not None and n_tag.text:
+                name = n_tag.text.strip()
+                logger.debug("ALAINA: Found n tag with value: %s", name)
             
             if not name:
                 name = 'Unknown Location'
                 logger.debug("ALAINA: No name found, using 'Unknown Location'")
             
-            # Get coordinates from either Point or Polygon using proper namespace
+            # Get coordinates from either Point or Polygon
             coords = None
-            point = placemark.find(".//kml:Point", namespaces=KML_NS)
-            polygon = placemark.find(".//kml:Polygon", namespaces=KML_NS)
-            
             if point is not None:
                 logger.debug("ALAINA: Found Point geometry")
-                coords_elem = point.find(".//kml:coordinates", namespaces=KML_NS)
-                if coords_elem is not None and coords_elem.text:
-                    coords_text = coords_elem.text.strip()
-                    coords_parts = coords_text.split(',')
-                    coords = {'lat': float(coords_parts[1]), 'lon': float(coords_parts[0])}
-                    logger.debug(f"ALAINA: Extracted coordinates: {coords}")
+                coords_texts = _XP_POINT_COORDS(point)
+                if coords_texts and coords_texts[0].strip():
+                    coords = _parse_coordinate(coords_texts[0])
+                    logger.debug("ALAINA: Extracted coordinates: %s", coords)
             elif polygon is not None:
                 logger.debug("ALAINA: Found Polygon geometry")
-                outer_boundary = polygon.find(".//kml:outerBoundaryIs", namespaces=KML_NS)
-                if outer_boundary is not None:
-                    linear_ring = outer_boundary.find(".//kml:LinearRing", namespaces=KML_NS)
-                    if linear_ring is not None:
-                        coords_elem = linear_ring.find(".//kml:coordinates", namespaces=KML_NS)
-                        if coords_elem is not None and coords_elem.text:
-                            # Take the first coordinate pair from the polygon
-                            coords_text = coords_elem.text.strip().split()[0]
-                            coords_parts = coords_text.split(',')
-                            coords = {'lat': float(coords_parts[1]), 'lon': float(coords_parts[0])}
-                            logger.debug(f"ALAINA: Extracted first polygon coordinate: {coords}")
+                coords_texts = _XP_POLY_COORDS(polygon)
+                if coords_texts and coords_texts[0].strip():
+                    # Take the first coordinate pair from the polygon
+                    # Only split off the first tuple rather than the whole ring
+                    coords = _parse_coordinate(coords_texts[0].split(None, 1)[0])
+                    logger.debug("ALAINA: Extracted first polygon coordinate: %s", coords)
             
             # Get extended data if available
             extended_data = {}
-            ext_data = placemark.find(".//kml:ExtendedData", namespaces=KML_NS)
             if ext_data is not None:
                 logger.debug("ALAINA: Found ExtendedData")
-                for data in ext_data.findall(".//kml:Data", namespaces=KML_NS):
+                for data in _XP_EXTDATA(ext_data):
                     name_attr = data.get('name')
-                    value_elem = data.find(".//kml:value", namespaces=KML_NS)
-                    if name_attr and value_elem is not None and value_elem.text:
-                        extended_data[name_attr] = value_elem.text
-                        logger.debug(f"ALAINA: Found extended data: {name_attr} = {value_elem.text}")
+                    values = _XP_DATA_VALUE(data)
+                    if name_attr and values and values[0]:
+                        extended_data[name_attr] = str(values[0])
+                        logger.debug("ALAINA: Found extended data: %s = %s", name_attr, values[0])
             
             # Get LookAt data for additional context
-            look_at = placemark.find(".//kml:LookAt", namespaces=KML_NS)
             if look_at is not None:
                 logger.debug("ALAINA: Found LookAt data")
-                for elem_name in ['altitude', 'range', 'heading', 'tilt']:
-                    elem = look_at.find(f".//kml:{elem_name}", namespaces=KML_NS)
-                    if elem is not None and elem.text:
-                        extended_data[f'view_{elem_name}'] = elem.text
-                        logger.debug(f"ALAINA: Found view {elem_name}: {elem.text}")
-            
-            # Extract context without relying on POS tagging if it fails
-            try:
-                context = self._extract_context(name)
-                logger.debug(f"ALAINA: Extracted context: {context}")
-            except Exception as e:
-                logger.error(f"ALAINA: Error extracting context: {str(e)}")
-                context = {
-                    'organizations': [],
-                    'locations': [],
-                    'key_terms': [name]  # At least include the name as a key term
-                }
+                for elem in look_at:
+                    key = _LOOKAT_KEYS.get(elem.tag)
+                    if key and elem.text:
+                        extended_data[key] = elem.text
+                        logger.debug("ALAINA: Found %s: %s", key, elem.text)
             
+            # Context is filled in by parse_kml once all terms have been geocoded
             return {
                 'name': name,
                 'coordinates': coords,
                 'extended_data': extended_data,
-                'context': context
+                'context': None
             }
         except Exception as e:
             logger.error(f"ALAINA: Error extracting placemark info: {str(e)}")
             return None
 
-    def _extract_context(self, name: str) -> Dict:
+    def _build_context(self, name: str, words: List[str] = None) -> Dict:
+        """Extract context for a name, falling back to the bare name on error."""
+        # Fall back to the bare name if context extraction fails
+        try:
+            context = self._extract_context(name, words)
+            logger.debug("ALAINA: Extracted context: %s", context)
+        except Exception as e:
+            logger.error(f"ALAINA: Error extracting context: {str(e)}")
+            context = {
+                'organizations': [],
+                'locations': [],
+                'key_terms': [name]  # At least include the name as a key term
+            }
+        return context
+
+    def _split_name(self, name: str) -> List[str]:
+        """Split a location name into cleaned words worth classifying."""
+        # str.split() already strips whitespace from every word
+        return [w for w in name.split() if len(w) > 2]
+
+    def _queue_location_terms(self, words: List[str], executor: Optional[ThreadPoolExecutor], pending: Dict) -> None:
+        """Submit geocoding for any words that have not been looked up yet."""
+        if not self.deep_geocode:
+            return  # The offline gazetteer needs no network lookups
+        for word in words:
+            if word in pending or word in self._location_terms or not _is_geocode_candidate(word):
+                continue
+            if self._is_likely_organization(word):
+                continue
+            # Worker threads overlap slow responses; the rate limiter spaces out requests
+            pending[word] = executor.submit(self._is_likely_location, word)
+
+    def _extract_context(self, name: str, words: List[str] = None) -> Dict:
         """Extract contextual information from location name."""
-        logger.debug(f"ALAINA: Extracting context from name: {name}")
+        logger.debug("ALAINA: Extracting context from name: %s", name)
         
-        # Split name into words and clean them
-        words = [w.strip() for w in name.split() if len(w.strip()) > 2]
+        # Split name into words and clean them, unless the caller already has
+        if words is None:
+            words = self._split_name(name)
         
-        context = {
-            'organizations': [],
-            'locations': [],
-            'key_terms': []
-        }
-        
-        # Add all words as key terms
-        context['key_terms'] = words
-        logger.debug(f"ALAINA: Found key terms: {context['key_terms']}")
+        logger.debug("ALAINA: Found key terms: %s", words)
         
-        # Try to identify organizations and locations
+        # Identify organizations and locations in a single pass over the words
+        organizations = []
+        locations = []
         for word in words:
             if self._is_likely_organization(word):
-                context['organizations'].append(word)
-                logger.debug(f"ALAINA: Found organization: {word}")
-            elif self._is_likely_location(word):
-                context['locations'].append(word)
-                logger.debug(f"ALAINA: Found location: {word}")
+                organizations.append(word)
+                logger.debug("ALAINA: Found organization: %s", word)
+            elif _is_geocode_candidate(word) and self._term_is_location(word):
+                locations.append(word)
+                logger.debug("ALAINA: Found location: %s", word)
         
-        return context
+        # All words are kept as key terms
+        return {
+            'organizations': organizations,
+            'locations': locations,
+            'key_terms': words
+        }
 
     def _is_likely_organization(self, term: str) -> bool:
         """Simple heuristic to identify if a term is likely an organization."""
-        org_indicators = ['Inc', 'Corp', 'LLC', 'Ltd', 'Company', 'Association']
-        return any(indicator in term for indicator in org_indicators)
+        return _is_organization_term(term)
+
+    def _term_is_location(self, term: str) -> bool:
+        """Look up a term's geocoding result; terms whose lookup failed count as not a location."""
+        if not self.deep_geocode:
+            return _is_known_place(term)
+        return self._location_terms.get(term, False)
 
-    def _is_likely_location(self, term: str) -> bool:
-        """Attempt to verify if a term is a location using geocoding."""
+    def _is_likely_location(self, term: str) -> Optional[bool]:
+        """Attempt to verify if a term is a location using geocoding.
+        
+        Returns None when the geocoder times out or errors, so the failure is not remembered.
+        """
         try:
-            logger.debug(f"ALAINA: Geocoding term: {term}")
-            location = self.geolocator.geocode(term, timeout=5)
-            return location is not None
+            logger.debug("ALAINA: Geocoding term: %s", term)
+            return _geocode_is_location(self._geocode, term)
         except GeocoderTimedOut:
             logger.warning(f"ALAINA: Geocoding timed out for term: {term}")
-            return False
+            return None
+        except GeocoderServiceError as e:
+            logger.warning(f"ALAINA: Geocoding failed for term {term}: {str(e)}")
+            return None
+
+    def _reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
+        """Get a place name for coordinates, sharing lookups between nearby points."""
+        # Rounding to 4 decimals (~11m) lets placemarks at the same spot share one request
+        return _reverse_geocode_name(self._reverse, round(lat, 4), round(lon, 4))
+
+    def _resolve_bias_name(self, location: Dict) -> Optional[str]:
+        """Resolve the place name used to bias searches for a location, once per location."""
+        if 'bias_name' in location:
+            return location['bias_name']
+        
+        bias_name = None
+        if location.get('coordinates'):
+            coords = location['coordinates']
+            # Try to get a location name for these coordinates
+            try:
+                bias_name = self._reverse_geocode(coords['lat'], coords['lon'])
+            except Exception as e:
+                logger.warning(f"ALAINA: Could not reverse geocode coordinates: {str(e)}")
+                # Fallback to using Clark County, Nevada
+                bias_name = "Clark County, Nevada, United States"
+                logger.info("ALAINA: Using fallback location: Clark County, Nevada")
+        
+        # Stash on the location so later searches for it skip the lookup
+        location['bias_name'] = bias_name
+        return bias_name
 
     def _generate_search_queries(self, location: Dict) -> List[str]:
         """Generate a single optimized search query for the location."""
         name = location['name']
         queries = []
         
-        # Split the name into parts and use meaningful words
-        words = [w for w in name.split() if len(w) > 2 and w.lower() not in ['the', 'and', 'test', 'model', 'city']]
+        # Use the first two meaningful words of the name, stopping once both are found
+        words = list(islice(
+            (w for w in name.split() if len(w) > 2 and w.lower() not in _QUERY_STOPWORDS),
+            2
+        ))
         
         # Create a query focusing on the location name
-        if words:
-            # Use the first two meaningful words if available
-            if len(words) >= 2:
-                main_query = f"{words[0]} {words[1]}"
-            else:
-                main_query = words[0]
-        else:
-            main_query = name
+        main_query = ' '.join(words) if words else name
             
         # Add Nevada context since we know it's in Clark County, Nevada
         main_query += " Nevada"
@@ -358,144 +645,216 @@ class LocationAnalyzer:
         logger.info(f"ALAINA: Generated search query: {main_query}")
         return queries
 
-    def _search_with_retry(self, query: str, location: Dict, max_results: int) -> List[Dict]:
-        """Execute a search with retry logic and caching."""
-        cache_key = self._generate_cache_key(query, location)
+    def _search_with_retry(self, query: str, location: Dict, max_results: int, cache_keys: Optional[List[str]] = None) -> List[Dict]:
+        """Execute a search with retry logic and caching.
+        
+        cache_keys are the keys the results are looked up and stored under;
+        by default the key for query and location.
+        """
+        if cache_keys is None:
+            cache_keys = [self._generate_cache_key(query, location)]
         
-        # Check cache first
-        if not self.bust_cache and cache_key in self.cache:
-            logger.info("ALAINA: Using cached results for query")
-            return self.cache[cache_key]
+        # Check cache first; any key holding results answers the search for all of them
+        if not self.bust_cache:
+            for cache_key in cache_keys:
+                if cache_key in self.cache:
+                    logger.info("ALAINA: Using cached results for query")
+                    cached = self.cache[cache_key]
+                    self._cache_results(cache_keys, cached)
+                    return cached
+        
+        # Only runs that actually hit the search API pay for key validation
+        self._ensure_api_key_valid()
 
-        for attempt in range(self.max_retries):
-            try:
-                logger.info(f"ALAINA: Executing search query: {query} (attempt {attempt + 1}/{self.max_retries})")
-                
-                # Build search parameters
-                url = "https://www.searchapi.io/api/v1/search"
-                headers = {
-                    "Accept": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                }
-                params = {
-                    "engine": "google",
-                    "q": query,
-                    "num": max_results,
-                    "gl": "us",
-                    "hl": "en"
-                }
-                
-                # Add location biasing if coordinates are available
-                if location.get('coordinates'):
-                    coords = location['coordinates']
-                    # Try to get a location name for these coordinates
-                    try:
-                        location_name = self.geolocator.reverse((coords['lat'], coords['lon']))
-                        if location_name:
-                            params.update({
-                                "location": str(location_name),
-                                "google_domain": "google.com"
-                            })
-                            logger.info(f"ALAINA: Using location: {location_name}")
-                    except Exception as e:
-                        logger.warning(f"ALAINA: Could not reverse geocode coordinates: {str(e)}")
-                        # Fallback to using Clark County, Nevada
-                        params.update({
-                            "location": "Clark County, Nevada, United States",
-                            "google_domain": "google.com"
-                        })
-                        logger.info("ALAINA: Using fallback location: Clark County, Nevada")
-                
-                response = requests.get(url, headers=headers, params=params)
-                
-                if response.status_code != 200:
-                    raise Exception(f"Search API returned status code {response.status_code}: {response.text}")
-                
-                results = response.json()
-                
-                # Debug raw response
-                logger.debug(f"ALAINA: Raw API response: {json.dumps(results, indent=2)}")
-                
-                # Extract and format organic results
-                formatted_results = []
-                for result in results.get("organic_results", []):
-                    formatted_results.append({
-                        'title': result.get('title', ''),
-                        'link': result.get('link', ''),
-                        'body': result.get('snippet', '')
-                    })
-                
-                # Cache successful results
-                self.cache[cache_key] = formatted_results
-                self._save_cache()
-                
-                # Log successful API call
-                self._log_api_usage(query, True)
-                
-                return formatted_results
-                
-            except Exception as e:
-                logger.error(f"ALAINA: Error during search for {query}: {str(e)}")
-                # Log failed API call
-                self._log_api_usage(query, False)
-                
-                if "quota" in str(e).lower():
+        # Retries with exponential backoff (honouring Retry-After) happen in the session's adapter
+        try:
+            logger.info(f"ALAINA: Executing search query: {query}")
+            
+            # Build search parameters
+            url = "https://www.searchapi.io/api/v1/search"
+            params = {
+                "engine": "google",
+                "q": query,
+                "num": max_results,
+                "gl": "us",
+                "hl": "en"
+            }
+            
+            # Add location biasing if coordinates are available
+            location_name = self._resolve_bias_name(location)
+            if location_name:
+                params.update({
+                    "location": location_name,
+                    "google_domain": "google.com"
+                })
+                logger.info(f"ALAINA: Using location: {location_name}")
+            
+            response = self._http.get(url, params=params, timeout=self.request_timeout)
+            
+            if response.status_code != 200:
+                logger.error(f"ALAINA: Search API returned status code {response.status_code} for {query}: {response.text}")
+                if "quota" in response.text.lower():
                     logger.error("ALAINA: SerpAPI quota exceeded")
-                    return []
-                
-                delay = self.base_delay * (2 ** attempt)
-                logger.warning(f"ALAINA: Search failed, waiting {delay} seconds before retry")
-                time.sleep(delay)
-                continue
-        
-        logger.error(f"ALAINA: Max retries reached for query: {query}")
-        return []
+                self._log_api_usage(query, False)
+                return []
+            
+            results = response.json()
+            
+            # Debug raw response, only serialized when debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ALAINA: Raw API response: %s", json.dumps(results, indent=2))
+            
+            # Extract and format organic results, stopping at max_results
+            formatted_results = []
+            for result in islice(results.get("organic_results", []), max_results):
+                formatted_results.append({
+                    'title': result.get('title', ''),
+                    'link': result.get('link', ''),
+                    'body': result.get('snippet', '')
+                })
+            
+            # Cache successful results
+            self._cache_results(cache_keys, formatted_results)
+            
+            # Log successful API call
+            self._log_api_usage(query, True)
+            
+            return formatted_results
+            
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"ALAINA: Error during search for {query}: {str(e)}")
+            # Log failed API call
+            self._log_api_usage(query, False)
+            return []
+
+    def _cache_results(self, cache_keys: List[str], results: List[Dict]) -> None:
+        """Store search results under every key that does not already hold them."""
+        with self._cache_lock:
+            for cache_key in cache_keys:
+                if self.cache.get(cache_key) is not results:
+                    self.cache[cache_key] = results
+                    self._cache_dirty = True
 
     def search_location_context(self, max_results: int = 5) -> List[Dict]:
         """Search for relevant information about each location."""
-        search_results = []
-        
+        # Generate single optimized query per location, grouping nearby locations that share one
+        location_queries = []
+        query_locations = {}
         for location in self.locations:
-            logger.info(f"ALAINA: Searching for information about {location['name']}")
-            
-            # Generate single optimized query
-            queries = self._generate_search_queries(location)
-            logger.debug(f"ALAINA: Generated query: {queries[0]}")
-            
-            # Single search with location biasing
-            results = self._search_with_retry(queries[0], location, max_results)
-            
-            search_results.append({
+            query = self._generate_search_queries(location)[0]
+            logger.debug("ALAINA: Generated query for %s: %s", location['name'], query)
+            # Far-apart locations with the same query get separate searches,
+            # so each search stays biased towards where its locations are
+            group = (query, _bias_tile(location))
+            location_queries.append(group)
+            query_locations.setdefault(group, []).append(location)
+        
+        logger.info(f"ALAINA: Running {len(query_locations)} unique searches for {len(self.locations)} locations")
+        
+        # Each unique query is one independent network round-trip, so run a few at once
+        unique_results = {}
+        with ThreadPoolExecutor(max_workers=self.search_workers) as executor:
+            futures = {
+                executor.submit(self._search_query, group[0], locations, max_results): group
+                for group, locations in query_locations.items()
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                unique_results[futures[future]] = future.result()
+                logger.info(f"ALAINA: Completed search {done}/{len(futures)}")
+        
+        self._save_cache_if_dirty()
+        
+        return [
+            {
                 'location': location['name'],
-                'results': results[:max_results]
-            })
+                'results': unique_results[group][:max_results]
+            }
+            for location, group in zip(self.locations, location_queries)
+        ]
+
+    def _search_query(self, query: str, locations: List[Dict], max_results: int) -> List[Dict]:
+        """Run one web search on behalf of every location that generated the query."""
+        logger.info(f"ALAINA: Searching for information about {', '.join(loc['name'] for loc in locations)}")
         
-        return search_results
+        # Single search, biased towards the centre of the nearby locations that share it;
+        # results are cached under each location's own key so they stay stable as groups change
+        cache_keys = [self._generate_cache_key(query, location) for location in locations]
+        return self._search_with_retry(query, self._group_bias_location(locations), max_results, cache_keys)
 
-    def _extract_coordinates(self, placemark) -> Tuple[float, float]:
-        """Extract coordinates from a KML placemark."""
-        coords = placemark.Point.coordinates.text.strip().split(',')
-        return float(coords[1]), float(coords[0])  # lat, lon
+    def _group_bias_location(self, locations: List[Dict]) -> Dict:
+        """Build the location used to bias a search shared by several nearby locations.
         
-    def analyze_contracts(self, placemark) -> Dict:
-        """Analyze government contracts for a location."""
+        Locations are grouped by _bias_tile first, so the centroid stays within their tile.
+        """
+        if len(locations) == 1:
+            return locations[0]
+        
+        coords = [loc['coordinates'] for loc in locations if loc.get('coordinates')]
+        if not coords:
+            return locations[0]
+        
+        # Centroid of the group's coordinates
+        return {
+            'name': locations[0]['name'],
+            'coordinates': {
+                'lat': sum(c['lat'] for c in coords) / len(coords),
+                'lon': sum(c['lon'] for c in coords) / len(coords)
+            }
+        }
+
+    def analyze_all_contracts(self) -> List[Dict]:
+        """Analyze government contracts for every parsed location, searching them concurrently."""
+        located = [location for location in self.locations if location.get('coordinates')]
+        points = [(loc['coordinates']['lat'], loc['coordinates']['lon']) for loc in located]
+        
+        # Each location is one independent USAspending round-trip, so run a few at once;
+        # a failed search is reported on the locations it covers rather than raised
         try:
-            lat, lon = self._extract_coordinates(placemark)
-            
-            logger.info(f"ALAINA: Searching for contracts near {placemark.name.text if hasattr(placemark, 'name') else 'Unknown'} ({lat}, {lon})")
-            
-            # Search for contracts
-            contracts = self.contract_api.search_contracts_by_location(
-                latitude=lat,
-                longitude=lon,
-                bust_cache=self.bust_cache
+            batch = self.contract_api.search_many(
+                points, bust_cache=self.bust_cache, max_workers=self.search_workers, return_exceptions=True
             )
+        except Exception as e:
+            batch = [e] * len(located)
+        contracts_by_location = {}
+        for location, contracts in zip(located, batch):
+            contracts_by_location[id(location)] = contracts
+        
+        # Analyses are in the same order as self.locations
+        return [
+            self.analyze_contracts(location, contracts_by_location.get(id(location)))
+            for location in self.locations
+        ]
+
+    def analyze_contracts(self, location: Dict, contracts: Optional[Union[List[Dict], Exception]] = None) -> Dict:
+        """Analyze government contracts for a location parsed by parse_kml.
+        
+        Contracts already fetched for the location (e.g. by analyze_all_contracts)
+        can be passed in, or the exception that failed their search; otherwise
+        they are searched for here.
+        """
+        try:
+            if not location.get('coordinates'):
+                raise ValueError(f"No coordinates for {location['name']}")
+            if isinstance(contracts, Exception):
+                raise contracts
+            lat = location['coordinates']['lat']
+            lon = location['coordinates']['lon']
+            
+            if contracts is None:
+                logger.info(f"ALAINA: Searching for contracts near {location['name']} ({lat}, {lon})")
+                
+                # Search for contracts
+                contracts = self.contract_api.search_contracts_by_location(
+                    latitude=lat,
+                    longitude=lon,
+                    bust_cache=self.bust_cache
+                )
             
             # Analyze the results
             analysis = self.contract_api.analyze_contracts(contracts)
             
             # Store results
-            self.contract_results[placemark.name.text if hasattr(placemark, 'name') else f"{lat},{lon}"] = analysis
+            self.contract_results[location['name']] = analysis
             
             return analysis
             
@@ -519,6 +878,9 @@ def main():
     arg_parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     arg_parser.add_argument("--search-radius", type=float, default=50, help="Search radius in miles for contract analysis")
     arg_parser.add_argument("--contracts-only", action="store_true", help="Only perform contract analysis (skip web search)")
+    arg_parser.add_argument("--geocode-workers", type=int, default=4, help=f"Number of threads used to geocode location terms with --deep-geocode (max {MAX_GEOCODE_WORKERS})")
+    arg_parser.add_argument("--deep-geocode", action="store_true", help="Geocode words in place names with Nominatim instead of the offline gazetteer")
+    arg_parser.add_argument("--search-workers", type=int, default=4, help=f"Number of concurrent web and contract searches (max {MAX_SEARCH_WORKERS})")
     
     args = arg_parser.parse_args()
     
@@ -528,38 +890,42 @@ def main():
             max_places=args.max_places,
             debug=args.debug,
             bust_cache=args.bust_cache,
-            search_radius_miles=args.search_radius
+            search_radius_miles=args.search_radius,
+            geocode_workers=args.geocode_workers,
+            search_workers=args.search_workers,
+            deep_geocode=args.deep_geocode
         )
         
-        with open(args.kml_file, 'rb') as f:
-            kml_doc = parser.parse(f).getroot()
+        # Parse the KML once and reuse the extracted locations for every analysis
+        analyzer.parse_kml()
             
-        placemarks = kml_doc.findall(".//kml:Placemark", namespaces=KML_NS)
+        logger.info(f"ALAINA: Processing {len(analyzer.locations)} locations")
         
-        if args.max_places:
-            placemarks = placemarks[:args.max_places]
-            
-        logger.info(f"ALAINA: Processing {len(placemarks)} locations")
+        # Perform web search once for all locations unless contracts-only is specified
+        search_results = []
+        if not args.contracts_only:
+            search_results = analyzer.search_location_context(max_results=args.max_results)
+        
+        # Contract searches for all locations run concurrently up front
+        contract_analyses = analyzer.analyze_all_contracts()
         
-        for placemark in placemarks:
-            name = placemark.name.text if hasattr(placemark, 'name') else "Unknown Location"
+        for idx, location in enumerate(analyzer.locations):
+            name = location['name']
             logger.info(f"ALAINA: Processing {name}")
             
-            # Perform contract analysis
-            contract_analysis = analyzer.analyze_contracts(placemark)
+            # Contract analyses are in the same order as analyzer.locations
+            contract_analysis = contract_analyses[idx]
             logger.info(f"ALAINA: Contract Analysis for {name}:")
             logger.info(f"ALAINA: {contract_analysis['summary']}")
             
             if contract_analysis['top_contractors']:
                 logger.info("ALAINA: Top Contractors:")
-                for contractor, amount in contract_analysis['top_contractors'].items():
+                for contractor, amount in contract_analysis['top_contractors']:
                     logger.info(f"ALAINA:   - {contractor}: ${amount:,.2f}")
             
-            # Perform web search unless contracts-only is specified
-            if not args.contracts_only:
-                search_results = analyzer.search_location_context(max_results=args.max_results)
-                if search_results:
-                    logger.info(f"ALAINA: Found {len(search_results)} web results for {name}")
+            # Search results are in the same order as analyzer.locations
+            if search_results and search_results[idx]['results']:
+                logger.info(f"ALAINA: Found {len(search_results[idx]['results'])} web results for {name}")
             
             logger.info("ALAINA: " + "="*50)
             
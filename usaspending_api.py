@@ -1,15 +1,103 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import atexit
 import logging
+import orjson
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import compress
+from typing import Dict, List, Optional, Tuple, Union
 import pandas as pd
-from haversine import haversine
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent award searches
+MAX_CONTRACT_WORKERS = 8
+
+# Upper bound on award search pages per location (100 awards each)
+MAX_AWARD_PAGES = 20
+# Award search pages requested at once after the first
+PAGE_FETCH_WORKERS = 4
+
+# Seconds the cache writer waits to gather more entries into one transaction
+CACHE_FLUSH_INTERVAL = 0.2
+
+# Nevada ZIP code prefixes: 890-891 Las Vegas area, 893-895 Reno area, 889 rural areas
+_NV_ZIP_PREFIXES = frozenset({"889", "890", "891", "893", "894", "895"})
+
+# Static parts of the award search request, shared by every search
+_SEARCH_URL = "https://api.usaspending.gov/api/v2/search/spending_by_award/"
+_AWARD_TYPES = ("A", "B", "C", "D")
+_SEARCH_FIELDS = (
+    "Award ID",
+    "Recipient Name",
+    "Award Amount",
+    "Start Date",
+    "End Date",
+    "Place of Performance Zip5",
+    "Description",
+    "Awarding Agency",
+    "Funding Agency"
+)
+_PAYLOAD_SKELETON = {
+    "filters": {
+        "award_type_codes": list(_AWARD_TYPES)
+    },
+    "fields": list(_SEARCH_FIELDS),
+    "limit": 100,  # Maximum allowed by API
+    "sort": "Award Amount",
+    "order": "desc"
+}
+
+# Award fields kept in cached results; the rest of each record is dropped
+_KEEP_FIELDS = (
+    "Award ID",
+    "Recipient Name",
+    "Award Amount",
+    "Start Date",
+    "End Date",
+    "Place of Performance Zip5",
+    "Awarding Agency",
+    "Funding Agency"
+)
+# Descriptions are only shown truncated, so longer text is not kept
+MAX_DESCRIPTION_LENGTH = 512
+
+def _project(result: Dict) -> Dict:
+    """Keep only the award fields used downstream, with a truncated description."""
+    projected = {field: result.get(field) for field in _KEEP_FIELDS}
+    projected["Description"] = (result.get("Description") or "")[:MAX_DESCRIPTION_LENGTH]
+    return projected
+
+# Award columns with few distinct values, stored as categories
+_CATEGORY_COLUMNS = ("Awarding Agency", "Funding Agency")
+
+def _coerce_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert award columns to compact dtypes in place."""
+    # Amounts stay float64; float32 would round dollar sums above ~16 million
+    if "Award Amount" in df:
+        df["Award Amount"] = pd.to_numeric(df["Award Amount"], errors="coerce")
+    for column in _CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("category")
+    return df
+
+def _default_date_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
+    """Fill in a missing search date range with the last 10 years."""
+    if not end_date:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+    if not start_date:
+        start_date = (datetime.now() - timedelta(days=10*365)).strftime("%Y-%m-%d")
+    return start_date, end_date
+
 class USASpendingAPI:
     """Handler for USAspending.gov API interactions."""
     
@@ -22,22 +110,110 @@ class USASpendingAPI:
             radius_miles: Search radius in miles for location-based queries
         """
         self.radius_miles = radius_miles
-        self.cache_file = "contract_cache.json"
+        self.cache_file = "contract_cache.sqlite"
+        # Searches may run on worker threads, so cache access is serialized
+        self._cache_lock = threading.Lock()
         self._load_cache()
+        self._tile_states = {}  # (lat * 10, lon * 10) tile -> state code resolved this run
+        # Cache entries are written by a background thread in batches; entries
+        # not yet written are served from _pending_writes
+        self._pending_writes = {}  # cache key -> compressed blob
+        self._write_q = queue.Queue()
+        self._writer = threading.Thread(target=self._cache_writer, name="contract-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self._flush_cache)
+        
+        # One keep-alive session for every USAspending call; transient
+        # failures and rate limiting are retried with a short backoff
+        self._session = requests.Session()
+        self._session.headers.update({
+            "User-Agent": "location_analyzer/1.0",
+            "Accept-Encoding": "gzip"
+        })
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],  # The award search POST is a read-only query
+            raise_on_status=False
+        )
+        self._session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
     
     def _load_cache(self):
-        """Load the contract search cache."""
-        try:
-            with open(self.cache_file, 'r') as f:
-                self.cache = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.cache = {}
-            self._save_cache()
+        """Open the contract search cache, creating it if needed."""
+        # One row per search; entries are read and written individually
+        self._cache_db = sqlite3.connect(self.cache_file, isolation_level=None, check_same_thread=False)
+        self._cache_db.execute("PRAGMA journal_mode=WAL")
+        self._cache_db.execute("PRAGMA synchronous=NORMAL")
+        self._cache_db.execute("CREATE TABLE IF NOT EXISTS cache (k TEXT PRIMARY KEY, v BLOB)")
+        # State codes per 0.1 degree tile, kept across runs
+        self._cache_db.execute("CREATE TABLE IF NOT EXISTS state_cache (tile TEXT PRIMARY KEY, state TEXT)")
+    
+    def _get_cached(self, cache_key: str) -> Optional[List[Dict]]:
+        """Return the cached contracts for a key, or None if not cached."""
+        with self._cache_lock:
+            blob = self._pending_writes.get(cache_key)
+            if blob is None:
+                row = self._cache_db.execute("SELECT v FROM cache WHERE k = ?", (cache_key,)).fetchone()
+                if row is None:
+                    return None
+                blob = row[0]
+        return orjson.loads(zlib.decompress(blob))
     
-    def _save_cache(self):
-        """Save the contract search cache."""
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+    def _save_cache(self, cache_key: str, results: List[Dict]):
+        """Queue the contracts for one search to be saved to the cache."""
+        self._save_cache_blob(cache_key, zlib.compress(orjson.dumps(results)))
+    
+    def _save_cache_blob(self, cache_key: str, blob: bytes):
+        """Queue an already compressed cache entry to be saved."""
+        with self._cache_lock:
+            self._pending_writes[cache_key] = blob
+        self._write_q.put((cache_key, blob))
+    
+    def _cache_writer(self):
+        """Write queued cache entries, one transaction per batch, until stopped."""
+        stopping = False
+        while not stopping:
+            item = self._write_q.get()
+            if item is None:
+                break
+            
+            # Gather whatever else arrives shortly into the same transaction
+            batch = [item]
+            deadline = time.monotonic() + CACHE_FLUSH_INTERVAL
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._write_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            try:
+                with self._cache_lock:
+                    self._cache_db.execute("BEGIN")
+                    self._cache_db.executemany("INSERT OR REPLACE INTO cache (k, v) VALUES (?, ?)", batch)
+                    self._cache_db.execute("COMMIT")
+                    # Drop entries now on disk, unless a newer result was queued meanwhile
+                    for cache_key, blob in batch:
+                        if self._pending_writes.get(cache_key) is blob:
+                            del self._pending_writes[cache_key]
+            except sqlite3.Error as e:
+                logger.error(f"ALAINA: Error saving contract cache: {str(e)}")
+                with self._cache_lock:
+                    if self._cache_db.in_transaction:
+                        self._cache_db.execute("ROLLBACK")
+    
+    def _flush_cache(self):
+        """Write any queued cache entries and stop the writer thread."""
+        if self._writer.is_alive():
+            self._write_q.put(None)
+            self._writer.join()
     
     def _get_cache_key(self, lat: float, lon: float) -> str:
         """Generate a cache key for a location."""
@@ -46,13 +222,39 @@ class USASpendingAPI:
     def _get_state_from_coords(self, latitude: float, longitude: float) -> str:
         """Get state abbreviation from coordinates using reverse geocoding."""
         try:
-            location = requests.get(
-                f"https://api.usaspending.gov/api/v2/recipient/state/{latitude}/{longitude}/"
-            ).json()
-            return location.get("state_code", "NV")  # Default to Nevada if not found
-        except:
+            # Nearby points (~7 miles) share one lookup
+            tile = (int(round(latitude * 10)), int(round(longitude * 10)))
+            state_code = self._tile_states.get(tile)
+            if state_code is None:
+                # Failed lookups raise and so are never memoized
+                state_code = self._lookup_tile_state(*tile)
+                self._tile_states[tile] = state_code
+            return state_code
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"ALAINA: State lookup failed for ({latitude}, {longitude}), using NV: {str(e)}")
             return "NV"  # Default to Nevada on error
     
+    def _lookup_tile_state(self, lat_q: int, lon_q: int) -> str:
+        """Get the state for a 0.1 degree tile from the cache or the API."""
+        tile = f"{lat_q}_{lon_q}"
+        with self._cache_lock:
+            row = self._cache_db.execute("SELECT state FROM state_cache WHERE tile = ?", (tile,)).fetchone()
+        if row is not None:
+            return row[0]
+        
+        # Errors (after the session's retries) are raised so they are neither memoized nor stored
+        response = self._session.get(
+            f"https://api.usaspending.gov/api/v2/recipient/state/{lat_q / 10}/{lon_q / 10}/",
+            timeout=(3, 5)
+        )
+        response.raise_for_status()
+        location = orjson.loads(response.content)
+        state_code = location.get("state_code", "NV")  # Default to Nevada if not found
+        
+        with self._cache_lock:
+            self._cache_db.execute("INSERT OR REPLACE INTO state_cache (tile, state) VALUES (?, ?)", (tile, state_code))
+        return state_code
+    
     def search_contracts_by_location(
         self,
         latitude: float,
@@ -64,100 +266,68 @@ class USASpendingAPI:
         """Search for contracts near a specific location."""
         cache_key = self._get_cache_key(latitude, longitude)
         
-        if not bust_cache and cache_key in self.cache:
-            logger.info(f"ALAINA: Using cached contract results for location ({latitude}, {longitude})")
-            return self.cache[cache_key]
+        if not bust_cache:
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                logger.info(f"ALAINA: Using cached contract results for location ({latitude}, {longitude})")
+                return cached
         
-        # Default to last 10 years if dates not provided
-        if not end_date:
-            end_date = datetime.now().strftime("%Y-%m-%d")
-        if not start_date:
-            start_date = (datetime.now() - timedelta(days=10*365)).strftime("%Y-%m-%d")
+        start_date, end_date = _default_date_range(start_date, end_date)
         
         # Get state from coordinates
         state_code = self._get_state_from_coords(latitude, longitude)
         
+        logger.info(f"ALAINA: Searching contracts in {state_code} near ({latitude}, {longitude})")
+        filtered_results = self._search_state(state_code, start_date, end_date)
+        if filtered_results is None:
+            return []
+        
+        # Cache the results
+        self._save_cache(cache_key, filtered_results)
+        
+        return filtered_results
+    
+    def _search_state(self, state_code: str, start_date: str, end_date: str) -> Optional[List[Dict]]:
+        """Search for contracts performed in a state and filter them to the area.
+        
+        Returns None if the search failed, so the failure is not cached.
+        """
+        # Only the date range and state vary between searches
         payload = {
+            **_PAYLOAD_SKELETON,
             "filters": {
-                "award_type_codes": ["A", "B", "C", "D"],
-                "time_period": [
-                    {
-                        "start_date": start_date,
-                        "end_date": end_date
-                    }
-                ],
-                "place_of_performance_locations": [
-                    {
-                        "country": "USA",
-                        "state": state_code
-                    }
-                ]
-            },
-            "fields": [
-                "Award ID",
-                "Recipient Name",
-                "Award Amount",
-                "Start Date",
-                "End Date",
-                "Place of Performance Zip5",
-                "Description",
-                "Awarding Agency",
-                "Funding Agency",
-                "Place of Performance State Code",
-                "Place of Performance City Code"
-            ],
-            "page": 1,
-            "limit": 100,  # Maximum allowed by API
-            "sort": "Award Amount",
-            "order": "desc"
+                **_PAYLOAD_SKELETON["filters"],
+                "time_period": [{"start_date": start_date, "end_date": end_date}],
+                "place_of_performance_locations": [{"country": "USA", "state": state_code}]
+            }
         }
         
         try:
-            logger.info(f"ALAINA: Searching contracts in {state_code} near ({latitude}, {longitude})")
-            response = requests.post(
-                f"{self.BASE_URL}/search/spending_by_award/",
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "User-Agent": "location_analyzer/1.0"
-                }
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"ALAINA: API Error: {response.status_code}")
-                logger.error(f"ALAINA: Response: {response.text}")
-                return []
-                
-            data = response.json()
-            all_results = data.get("results", [])
+            all_results = self._fetch_all_pages(payload)
+            if all_results is None:
+                return None
             
             logger.info(f"ALAINA: Found {len(all_results)} total contracts in {state_code}")
             
             # Filter results by distance using ZIP code prefix (first 3 digits for broader area)
-            filtered_results = []
-            for result in all_results:
-                try:
-                    # Get ZIP code from place of performance
-                    perf_zip = result.get("Place of Performance Zip5", "")
-                    if not perf_zip or len(perf_zip) < 3:
-                        continue
-                        
-                    # Use first 3 digits of ZIP for broader area matching
-                    # Nevada ZIP codes: 890-891 Las Vegas area, 893-895 Reno area, 889 rural areas
-                    if perf_zip[:3] in ["890", "891", "893", "894", "895", "889"]:
-                        filtered_results.append(result)
-                except:
-                    continue
+            # Filtering runs column-wise over a frame of all results
+            df = pd.DataFrame(all_results)
+            if "Place of Performance Zip5" in df:
+                keep = df["Place of Performance Zip5"].fillna("").astype(str).str[:3].isin(_NV_ZIP_PREFIXES)
+            else:
+                keep = pd.Series(False, index=df.index)
+            filtered_df = df[keep]
+            filtered_results = [_project(result) for result in compress(all_results, keep)]
             
             if filtered_results:
                 logger.info(f"ALAINA: Found {len(filtered_results)} relevant contracts in the area")
                 
                 # Log some details about the contracts
-                total_value = sum(float(r.get("Award Amount", 0)) for r in filtered_results)
+                total_value = pd.to_numeric(filtered_df["Award Amount"], errors="coerce").sum() if "Award Amount" in filtered_df else 0.0
                 logger.info(f"ALAINA: Total contract value: ${total_value:,.2f}")
                 
                 # Log unique agencies
-                agencies = set(r.get("Awarding Agency", "") for r in filtered_results)
+                agencies = filtered_df["Awarding Agency"].dropna().unique() if "Awarding Agency" in filtered_df else []
                 logger.info("ALAINA: Awarding agencies found:")
                 for agency in agencies:
                     if agency:
@@ -172,28 +342,170 @@ class USASpendingAPI:
             else:
                 logger.info("ALAINA: No contracts found in the specified area")
             
-            # Cache the results
-            self.cache[cache_key] = filtered_results
-            self._save_cache()
-            
             return filtered_results
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"ALAINA: Error searching contracts: {str(e)}")
-            if hasattr(e.response, 'text'):
+            if hasattr(getattr(e, 'response', None), 'text'):
                 logger.error(f"ALAINA: Response details: {e.response.text}")
-            return []
+            return None
+    
+    def _fetch_page(self, payload: Dict, page: int) -> Optional[Dict]:
+        """Fetch one page of award search results, or None if the API rejected it."""
+        response = self._session.post(
+            _SEARCH_URL,
+            json={**payload, "page": page},
+            timeout=(3, 30)
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"ALAINA: API Error: {response.status_code}")
+            logger.error(f"ALAINA: Response: {response.text}")
+            return None
+            
+        return orjson.loads(response.content)
+    
+    def _fetch_page_or_none(self, payload: Dict, page: int) -> Optional[Dict]:
+        """Fetch a page after the first, treating request errors like a rejected page."""
+        try:
+            return self._fetch_page(payload, page)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.error(f"ALAINA: Error fetching contracts page {page}: {str(e)}")
+            return None
+    
+    def _fetch_all_pages(self, payload: Dict) -> Optional[List[Dict]]:
+        """Fetch award search results across pages, up to MAX_AWARD_PAGES.
+        
+        Returns None if the first page could not be fetched; if a later page
+        fails, the pages fetched before it are returned.
+        """
+        data = self._fetch_page(payload, 1)
+        if data is None:
+            return None
+        results = data.get("results", [])
+        has_next = data.get("page_metadata", {}).get("hasNext", False)
+        if not has_next:
+            return results
+        
+        # The API only says whether another page exists, so pages are fetched in
+        # windows that start at one page and double up to PAGE_FETCH_WORKERS,
+        # until one reports it is the last
+        page = 1
+        window_size = 1
+        with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+            while has_next and page < MAX_AWARD_PAGES:
+                window = range(page + 1, min(page + window_size, MAX_AWARD_PAGES) + 1)
+                futures = [executor.submit(self._fetch_page_or_none, payload, p) for p in window]
+                for future in futures:
+                    data = future.result()
+                    if data is None:
+                        has_next = False  # Keep the pages fetched so far
+                    else:
+                        results.extend(data.get("results", []))
+                        has_next = data.get("page_metadata", {}).get("hasNext", False)
+                    if not has_next:
+                        # Later pages in the window are past the end, don't post them
+                        for pending in futures:
+                            pending.cancel()
+                        break
+                page = window[-1]
+                window_size = min(window_size * 2, PAGE_FETCH_WORKERS)
+        
+        if has_next:
+            logger.warning(f"ALAINA: Stopped after {MAX_AWARD_PAGES} pages of contracts")
+        return results
+    
+    def search_many(
+        self,
+        points: List[Tuple[float, float]],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        bust_cache: bool = False,
+        max_workers: int = 4,
+        return_exceptions: bool = False
+    ) -> List[Union[List[Dict], Exception]]:
+        """Search for contracts near several locations concurrently.
+        
+        Contracts are filtered by area within the state, so all uncached
+        points in the same state share a single search.
+        
+        Args:
+            points: (latitude, longitude) pairs to search around
+            max_workers: Number of searches in flight at once (capped at MAX_CONTRACT_WORKERS)
+            return_exceptions: Return the exception that failed a state's search
+                in place of each of its points' results, instead of raising it
+            
+        Returns:
+            One list of contracts per point, in the same order as points
+        """
+        results = [None] * len(points)
+        misses = {}  # index into points -> cache key
+        for idx, (latitude, longitude) in enumerate(points):
+            cache_key = self._get_cache_key(latitude, longitude)
+            cached = None if bust_cache else self._get_cached(cache_key)
+            if cached is not None:
+                logger.info(f"ALAINA: Using cached contract results for location ({latitude}, {longitude})")
+                results[idx] = cached
+            else:
+                misses[idx] = cache_key
+        
+        if not misses:
+            return results
+        
+        start_date, end_date = _default_date_range(start_date, end_date)
+        workers = max(1, min(max_workers, MAX_CONTRACT_WORKERS, len(misses)))
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # State lookups are independent round-trips too
+            states = executor.map(lambda idx: self._get_state_from_coords(*points[idx]), misses)
+            points_by_state = {}
+            for idx, state_code in zip(misses, states):
+                points_by_state.setdefault(state_code, []).append(idx)
+            
+            logger.info(
+                f"ALAINA: Searching contracts for {len(misses)} locations in "
+                f"{len(points_by_state)} states with {workers} workers"
+            )
+            futures = {
+                state_code: executor.submit(self._search_state, state_code, start_date, end_date)
+                for state_code in points_by_state
+            }
+        
+        # One search warms the cache for every point in its state
+        for state_code, indices in points_by_state.items():
+            try:
+                filtered_results = futures[state_code].result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                # Only the points in this state fail
+                logger.error(f"ALAINA: Error searching contracts in {state_code}: {str(e)}")
+                for idx in indices:
+                    results[idx] = e
+                continue
+            if filtered_results is None:
+                for idx in indices:
+                    results[idx] = []
+                continue
+            # Compressed once and stored under every point's key
+            blob = zlib.compress(orjson.dumps(filtered_results))
+            for idx in indices:
+                self._save_cache_blob(misses[idx], blob)
+                results[idx] = filtered_results
+        
+        return results
     
-    def analyze_contracts(self, contracts: List[Dict]) -> Dict:
+    def analyze_contracts(self, contracts: Union[List[Dict], pd.DataFrame]) -> Dict:
         """Analyze contract data to extract insights.
         
         Args:
-            contracts: List of contract dictionaries
+            contracts: List of contract dictionaries, or a DataFrame of them
+                (its columns are converted to compact dtypes in place)
             
         Returns:
             Dictionary containing analysis results
         """
-        if not contracts:
+        if len(contracts) == 0:
             return {
                 "total_contracts": 0,
                 "total_value": 0,
@@ -201,15 +513,19 @@ class USASpendingAPI:
                 "summary": "No contracts found in this area."
             }
         
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(contracts)
+        # Convert to DataFrame for easier analysis, reusing one that was already built
+        df = contracts if isinstance(contracts, pd.DataFrame) else pd.DataFrame(contracts)
+        df = _coerce_dtypes(df)
+        total_value = df["Award Amount"].sum()
+        # Group order is irrelevant since nlargest ranks the sums anyway
+        top = df.groupby("Recipient Name", observed=True, sort=False)["Award Amount"].sum().nlargest(5)
         
         # Basic analysis
         analysis = {
-            "total_contracts": len(contracts),
-            "total_value": df["Award Amount"].sum(),
-            "top_contractors": df.groupby("Recipient Name")["Award Amount"].sum().nlargest(5).to_dict(),
-            "summary": f"Found {len(contracts)} contracts worth ${df['Award Amount'].sum():,.2f}"
+            "total_contracts": len(df),
+            "total_value": total_value,
+            "top_contractors": list(zip(top.index.tolist(), top.tolist())),  # (name, amount), largest first
+            "summary": f"Found {len(df)} contracts worth ${total_value:,.2f}"
         }
         
         return analysis 
\ No newline at end of file